@@ -3,113 +3,253 @@
 import os
 import sys
 import time
+import queue
+import atexit
+import signal
+import socket
+import threading
+import hashlib
 import logging
+import logging.handlers
+import asyncio
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 from getpass import getpass
 from pathlib import Path
 
-try:
-    from jnpr.junos import Device
-    from jnpr.junos.utils.sw import SW
-    from jnpr.junos.utils.fs import FS
-    from jnpr.junos.exception import ConnectError, RpcError
-    from dotenv import load_dotenv
-except ImportError as e:
-    print(f"❌ Error: Required module not found: {e}")
-    print("Please install required packages: pip install junos-eznc python-dotenv")
-    sys.exit(1)
+# junos-eznc pulls in lxml and ncclient and takes the better part of a
+# second to import, so it is loaded lazily on first connection attempt
+Device = SW = FS = ConnectError = RpcError = None
+
+def _import_junos():
+    """Import junos-eznc on first use to keep CLI startup fast."""
+    global Device, SW, FS, ConnectError, RpcError
+    if Device is not None:
+        return
+    try:
+        from jnpr.junos import Device as _Device
+        from jnpr.junos.utils.sw import SW as _SW
+        from jnpr.junos.utils.fs import FS as _FS
+        from jnpr.junos.exception import ConnectError as _ConnectError
+        from jnpr.junos.exception import RpcError as _RpcError
+    except ImportError as e:
+        print(f"❌ Error: Required module not found: {e}")
+        print("Please install required packages: pip install junos-eznc")
+        sys.exit(1)
+    Device, SW, FS = _Device, _SW, _FS
+    ConnectError, RpcError = _ConnectError, _RpcError
+
+def _load_dotenv(path='.env'):
+    """Load KEY=VALUE lines from a .env file into os.environ.
+
+    Replaces python-dotenv: a single pass, no override of variables already
+    set in the environment, comments and blank lines ignored.
+    """
+    try:
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#') or '=' not in line:
+                    continue
+                key, _, value = line.partition('=')
+                os.environ.setdefault(key.strip(), value.strip().strip('\'"'))
+    except OSError:
+        pass
 
 # Configure custom logger with emojis
 class EmojiLogger:
+    # %-style args defer string formatting until after level filtering,
+    # which matters on hot paths like the copy progress callback
     def __init__(self, logger):
         self.logger = logger
-    
+
     def info(self, msg):
-        self.logger.info(f"ℹ️ {msg}")
-    
+        self.logger.info("ℹ️ %s", msg)
+
     def success(self, msg):
-        self.logger.info(f"✅ {msg}")
-    
+        self.logger.info("✅ %s", msg)
+
     def warning(self, msg):
-        self.logger.warning(f"⚠️ {msg}")
-    
+        self.logger.warning("⚠️ %s", msg)
+
     def error(self, msg):
-        self.logger.error(f"❌ {msg}")
-    
+        self.logger.error("❌ %s", msg)
+
     def debug(self, msg):
-        self.logger.debug(f"🔍 {msg}")
+        self.logger.debug("🔍 %s", msg)
 
-# Configure standard logging
+# The log format uses none of these, so skip the per-record
+# get_ident()/getpid() lookups that logging does by default
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+
+# Configure standard logging. File writes go through a queue to a listener
+# thread so hot-path log calls (e.g. copy progress) never block the main
+# thread on disk I/O; the rotating handler caps the log at 4 x 10 MB.
+_log_queue = queue.Queue(-1)
+_log_file_handler = logging.handlers.RotatingFileHandler(
+    'junos_upgrade.log', maxBytes=10 << 20, backupCount=3, delay=True)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
         logging.StreamHandler(),
-        logging.FileHandler('junos_upgrade.log')
+        logging.handlers.QueueHandler(_log_queue)
     ]
 )
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_file_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 standard_logger = logging.getLogger(__name__)
 logger = EmojiLogger(standard_logger)
 
-def load_config():
-    """Load configuration from .env file or command line arguments"""
-    # Load .env if it exists
-    load_dotenv(verbose=True)
-    
-    # Set up argument parser
-    parser = argparse.ArgumentParser(description='Junos OS Upgrade Utility')
-    parser.add_argument('-H', '--host', help='Junos device hostname/IP')
-    parser.add_argument('-u', '--user', help='Username for device authentication')
-    parser.add_argument('-p', '--password', help='Password (omit for secure prompt)')
-    parser.add_argument('-i', '--image', help='Junos image filename')
-    parser.add_argument('-l', '--local-path', help='Local directory containing the image')
-    parser.add_argument('-r', '--remote-path', help='Remote path on device (usually USB mount)')
-    parser.add_argument('-e', '--expected-version', help='Expected version prefix after upgrade')
-    parser.add_argument('-t', '--timeout', type=int, default=720, help='Reboot timeout in seconds')
-    parser.add_argument('-v', '--verbose', action='store_true', help='Enable verbose output')
-    
-    args = parser.parse_args()
-    
-    # Configure logging level based on verbose flag
-    if args.verbose:
-        standard_logger.setLevel(logging.DEBUG)
-    
-    # Priority: command line args > env vars > defaults
-    config = {
-        'host': args.host or os.getenv("JUNOS_HOST"),
-        'user': args.user or os.getenv("JUNOS_USER"),
-        'password': args.password or os.getenv("JUNOS_PASSWORD"),
-        'image_name': args.image or os.getenv("JUNOS_IMAGE"),
-        'local_image_dir': args.local_path or os.getenv("JUNOS_IMAGE_PATH"),
-        'remote_path': args.remote_path or os.getenv("REMOTE_PATH", "/var/tmp/usb"),
-        'expected_version': args.expected_version or os.getenv("EXPECTED_VERSION", "24.2R2.18"),
-        'timeout': args.timeout
-    }
-    
-    # Validate required parameters
-    missing = [k for k, v in config.items() if v is None and k not in ['password']]
-    if missing:
-        logger.error(f"Missing required configuration: {', '.join(missing)}")
-        parser.print_help()
-        sys.exit(1)
-    
-    # If password not provided, prompt securely
-    if not config['password']:
-        config['password'] = getpass("Enter device password: ")
-    
-    # Set full paths for convenience
-    config['local_image_fullpath'] = os.path.join(config['local_image_dir'], config['image_name'])
-    config['remote_image_fullpath'] = os.path.join(config['remote_path'], config['image_name'])
-    
-    logger.success("Configuration loaded successfully")
-    return config
+@dataclass(frozen=True)
+class UpgradeConfig:
+    """Validated upgrade parameters resolved from CLI args and environment."""
+    host: str
+    user: str
+    password: str
+    image_name: str
+    local_image_dir: str
+    remote_path: str
+    expected_version: str
+    timeout: int
+    devices_file: str = field(default=None, compare=False)
+    max_inflight: int = field(default=2, compare=False)
+    local_image_sha256: str = field(default=None, compare=False)
+    local_image_fullpath: str = field(init=False)
+    remote_image_fullpath: str = field(init=False)
+
+    # Fields that must resolve to a value; password is prompted for instead
+    _REQUIRED = ('host', 'user', 'image_name', 'local_image_dir',
+                 'remote_path', 'expected_version')
+
+    def __post_init__(self):
+        object.__setattr__(self, 'local_image_fullpath',
+                           os.path.join(self.local_image_dir, self.image_name))
+        object.__setattr__(self, 'remote_image_fullpath',
+                           os.path.join(self.remote_path, self.image_name))
+
+    def cache_sha256(self, digest):
+        """Record the image digest on this (frozen) config once computed."""
+        object.__setattr__(self, 'local_image_sha256', digest)
+
+    @classmethod
+    def from_env_and_args(cls):
+        """Build a config in one pass: parse args, fill from env, fail fast."""
+        # Load .env if it exists
+        _load_dotenv()
+
+        parser = argparse.ArgumentParser(description='Junos OS Upgrade Utility')
+        parser.add_argument('-H', '--host', help='Junos device hostname/IP')
+        parser.add_argument('-u', '--user', help='Username for device authentication')
+        parser.add_argument('-p', '--password', help='Password (omit for secure prompt)')
+        parser.add_argument('-i', '--image', help='Junos image filename')
+        parser.add_argument('-l', '--local-path', help='Local directory containing the image')
+        parser.add_argument('-r', '--remote-path', help='Remote path on device (usually USB mount)')
+        parser.add_argument('-e', '--expected-version', help='Expected version prefix after upgrade')
+        parser.add_argument('-t', '--timeout', type=int, default=720, help='Reboot timeout in seconds')
+        parser.add_argument('-d', '--devices-file', help='File with one device host per line (fleet mode)')
+        parser.add_argument('-m', '--max-inflight', type=int, default=2,
+                            help='Concurrent device upgrades in fleet mode (default: 2)')
+        parser.add_argument('-v', '--verbose', action='store_true', help='Enable verbose output')
+
+        args = parser.parse_args()
+
+        # Configure logging level based on verbose flag
+        if args.verbose:
+            standard_logger.setLevel(logging.DEBUG)
+
+        # Priority: command line args > env vars > defaults
+        resolved = {
+            'host': args.host or os.getenv("JUNOS_HOST"),
+            'user': args.user or os.getenv("JUNOS_USER"),
+            'password': args.password or os.getenv("JUNOS_PASSWORD"),
+            'image_name': args.image or os.getenv("JUNOS_IMAGE"),
+            'local_image_dir': args.local_path or os.getenv("JUNOS_IMAGE_PATH"),
+            'remote_path': args.remote_path or os.getenv("REMOTE_PATH", "/var/tmp/usb"),
+            'expected_version': args.expected_version or os.getenv("EXPECTED_VERSION", "24.2R2.18"),
+            'timeout': args.timeout,
+            'devices_file': args.devices_file,
+            'max_inflight': args.max_inflight
+        }
+
+        # Fail fast on anything missing before doing blocking work; in fleet
+        # mode the hosts come from the devices file rather than --host
+        required = cls._REQUIRED if not args.devices_file else \
+            tuple(name for name in cls._REQUIRED if name != 'host')
+        missing = [name for name in required if resolved[name] is None]
+        if missing:
+            logger.error(f"Missing required configuration: {', '.join(missing)}")
+            parser.print_help()
+            sys.exit(1)
+
+        # A zero-sized semaphore would make fleet mode wait forever
+        if resolved['max_inflight'] < 1:
+            logger.error("--max-inflight must be at least 1")
+            sys.exit(1)
+
+        # If password not provided, prompt securely
+        if not resolved['password']:
+            resolved['password'] = getpass("Enter device password: ")
+
+        config = cls(**resolved)
+        # Fire-and-forget: hash the image while we connect and check versions
+        _sha256_file_async(config.local_image_fullpath)
+        logger.success("Configuration loaded successfully")
+        return config
+
+def _throttled_progress(dev, report):
+    """Progress callback for safe_copy that logs at most once every 5 seconds.
+
+    The callback fires once per SCP block; logging every invocation turns the
+    copy phase CPU-bound and can drop throughput by orders of magnitude, so we
+    rate-limit and log through the standard logger to skip emoji formatting.
+    """
+    now = time.time()
+    if now - _throttled_progress.last > 5:
+        _throttled_progress.last = now
+        standard_logger.log(logging.INFO, "Copy progress (%s): %s", dev.hostname, report)
+
+_throttled_progress.last = 0.0
+
+# Open connections and per-device utility objects, reused across phases so
+# each phase does not pay a fresh SSH+NETCONF handshake or RPC context setup
+_dev_cache = {}
+_util_cache = {}
+
+def _sw(dev):
+    """Return a cached SW utility for the device, constructing it once."""
+    key = (id(dev), 'sw')
+    if key not in _util_cache:
+        _util_cache[key] = SW(dev)
+    return _util_cache[key]
+
+def _fs(dev):
+    """Return a cached FS utility for the device, constructing it once."""
+    key = (id(dev), 'fs')
+    if key not in _util_cache:
+        _util_cache[key] = FS(dev)
+    return _util_cache[key]
 
 def connect_device(host, user, password):
-    """Connect to the Junos device with error handling."""
+    """Connect to the Junos device with error handling, reusing open sessions."""
+    cached = _dev_cache.get((host, user))
+    if cached is not None and getattr(cached, 'connected', False):
+        logger.debug(f"Reusing existing connection to {host}")
+        return cached
+
+    _import_junos()
     logger.info(f"Connecting to device {host}...")
     try:
-        dev = Device(host=host, user=user, password=password)
+        # gather_facts=False skips the ~15 facts RPCs on open; facts are
+        # gathered lazily if anything actually reads them
+        dev = Device(host=host, user=user, password=password,
+                     normalize=True, gather_facts=False)
         dev.open()
+        _dev_cache[(host, user)] = dev
         logger.success(f"Connected to {host}")
         return dev
     except ConnectError as err:
@@ -119,70 +259,165 @@ def connect_device(host, user, password):
         logger.error(f"Unexpected error: {err}")
         return None
 
+# Set on SIGINT so long waits abort immediately instead of finishing their
+# current sleep; worker threads in fleet mode observe it too
+_stop = threading.Event()
+
+def _handle_sigint(signum, frame):
+    _stop.set()
+    raise KeyboardInterrupt
+
+def _tcp_up(host, port=830, timeout=3):
+    """Check whether a TCP listener is reachable on the given port."""
+    s = socket.socket()
+    s.settimeout(timeout)
+    try:
+        s.connect((host, port))
+        return True
+    except OSError:
+        return False
+    finally:
+        s.close()
+
+def wait_for_reboot_start(host, timeout=720):
+    """Wait until the device drops its NETCONF listener, i.e. the reboot began."""
+    logger.info(f"Waiting for device {host} to go down for reboot...")
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if not _tcp_up(host, timeout=2):
+            logger.info(f"Device {host} has gone down, reboot in progress")
+            return True
+        if _stop.wait(5):
+            return False
+    logger.warning(f"Device {host} still reachable after {timeout}s, probing anyway")
+    return False
+
 def probe_device(host, user, password, timeout=720):
     """Probe device to check if it's back online after reboot."""
+    _import_junos()
     logger.info(f"Waiting for device {host} to come back online (timeout: {timeout}s)...")
     deadline = time.time() + timeout
-    
+    sleep_interval = 2
+    # Built once outside the loop; auto_probe makes ncclient do its own
+    # short TCP probe before committing to the SSH handshake
+    device_kwargs = {'host': host, 'user': user, 'password': password,
+                     'normalize': True, 'gather_facts': False, 'auto_probe': 5}
+
     while time.time() < deadline:
-        try:
-            dev = Device(host=host, user=user, password=password)
-            dev.open()
-            logger.success(f"Device {host} is back online")
-            return dev
-        except ConnectError:
-            logger.debug("Device not ready yet, retrying...")
-        except Exception as err:
-            logger.warning(f"Unexpected error while probing: {err}")
-        time.sleep(10)
-    
+        # Only attempt the expensive NETCONF open once the TCP layer is up
+        if _tcp_up(host):
+            try:
+                dev = Device(**device_kwargs)
+                dev.open()
+                _dev_cache[(host, user)] = dev
+                logger.success(f"Device {host} is back online")
+                return dev
+            except ConnectError:
+                logger.debug("Device not ready yet, retrying...")
+            except Exception as err:
+                logger.warning(f"Unexpected error while probing: {err}")
+        else:
+            logger.debug("NETCONF port not listening yet, retrying...")
+        if _stop.wait(sleep_interval):
+            return None
+        sleep_interval = min(30, sleep_interval * 1.5)
+
     logger.error(f"Device did not come back online within {timeout} seconds")
     return None
 
+def _sha256_file(path):
+    """Compute the SHA-256 of a local file, or None if it does not exist.
+
+    The digest is cached under ~/.cache/junos_upgrade/ keyed by the absolute
+    path so repeated runs against the same image skip the full read; the
+    cache entry is ignored if the image is newer than it.
+    """
+    if not os.path.exists(path):
+        return None
+
+    # Same-named images in different directories must not share an entry,
+    # so the absolute path is hashed into the cache filename
+    path_key = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:16]
+    cache_file = (Path.home() / '.cache' / 'junos_upgrade'
+                  / f"{os.path.basename(path)}.{path_key}.sha256")
+    try:
+        if cache_file.exists() and cache_file.stat().st_mtime >= os.path.getmtime(path):
+            return cache_file.read_text().strip()
+    except OSError:
+        pass
+
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            # Bail out promptly on Ctrl-C or early exit; the executor worker
+            # is non-daemon and would otherwise pin shutdown on the full read
+            if _stop.is_set():
+                return None
+            sha256.update(block)
+    digest = sha256.hexdigest()
+
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        cache_file.write_text(digest)
+    except OSError:
+        pass
+    return digest
+
+# Background hashing of the local image, started as soon as the config is
+# validated so the read overlaps the NETCONF connect and version check
+_sha_executor = ThreadPoolExecutor(max_workers=1)
+_sha_futures = {}
+
+def _sha256_file_async(path):
+    """Start (or reuse) a background SHA-256 computation for a local file."""
+    if path not in _sha_futures:
+        _sha_futures[path] = _sha_executor.submit(_sha256_file, path)
+    return _sha_futures[path]
+
 def check_image_on_device(dev, remote_path, image_name):
     """Check if image file exists on the remote path."""
-    logger.info(f"Checking if image exists on device at {remote_path}/{image_name}")
-    fs = FS(dev)
+    full_remote_path = os.path.join(remote_path, image_name)
+    logger.info(f"Checking if image exists on device at {full_remote_path}")
+    fs = _fs(dev)
     try:
-        # Check if the directory exists
-        ls_result = fs.ls(remote_path)
-        if 'files' not in ls_result:
-            logger.warning(f"Remote path {remote_path} not found or empty")
-            return False
-        
-        # Check if the image exists
-        for file_entry in ls_result['files']:
-            if file_entry.get('name') == image_name:
-                logger.success(f"Image found on device at {remote_path}/{image_name}")
-                return True
-                
-        logger.info(f"Image not found on device")
+        # Listing the exact path returns one small entry (or None if the
+        # file is absent) instead of the whole directory listing
+        if fs.ls(full_remote_path):
+            logger.success(f"Image found on device at {full_remote_path}")
+            return True
+        logger.info("Image not found on device")
         return False
     except RpcError as err:
         logger.error(f"Error checking for image: {err}")
         return False
 
-def copy_image_to_device(dev, local_path, remote_path, image_name):
+def copy_image_to_device(dev, config):
     """Copy image to device via SCP with proper error handling."""
-    full_local_path = os.path.join(local_path, image_name)
-    logger.info(f"Copying image from {full_local_path} to {remote_path}/{image_name}")
-    
+    full_local_path = config.local_image_fullpath
+    logger.info(f"Copying image from {full_local_path} to {config.remote_image_fullpath}")
+
     # Check if local file exists
     if not os.path.exists(full_local_path):
         logger.error(f"Local file not found: {full_local_path}")
         return False
-    
+
     # Get file size for better progress tracking
     file_size = os.path.getsize(full_local_path)
     logger.info(f"File size: {file_size/1024/1024:.2f} MB")
-    
+
     try:
-        sw = SW(dev)
-        result = sw.safe_copy(
-            package=full_local_path,
-            remote_path=remote_path,
-            progress=True
-        )
+        result = _sftp_put(dev, full_local_path, config.remote_image_fullpath)
+        if not result:
+            # Fall back to the junos-eznc SCP path if the SFTP transfer failed
+            logger.warning("SFTP transfer unavailable, falling back to SCP")
+            sw = _sw(dev)
+            result = sw.safe_copy(
+                package=full_local_path,
+                remote_path=config.remote_path,
+                progress=_throttled_progress,
+                checksum=config.local_image_sha256,  # Skips safe_copy's own pre-transfer hash pass
+                checksum_algorithm='sha256'
+            )
         if result:
             logger.success("Image copy completed successfully")
             return True
@@ -193,22 +428,75 @@ def copy_image_to_device(dev, local_path, remote_path, image_name):
         logger.error(f"SCP error: {err}")
         return False
 
-def install_image(dev, remote_path, image_name):
+def _sftp_put(dev, local_path, remote_path):
+    """Push a file to the device over SFTP with a widened transfer window.
+
+    SCP acknowledges block by block and ends up RTT-limited on large images;
+    SFTP with a large window and packet size keeps writes pipelined so the
+    transfer is bandwidth-limited instead. Returns False if the SFTP
+    subsystem cannot be used, letting the caller fall back to SCP.
+    """
+    try:
+        transport = dev._conn._session.transport
+        transport.use_compression(False)  # Junos images are already compressed
+        transport.default_window_size = 2 ** 27
+        transport.default_max_packet_size = 32768
+        with transport.open_sftp_client() as sftp:
+            # Hand paramiko a 1 MiB-buffered file object so it reads large
+            # chunks instead of shuffling small Python-level buffers
+            with open(local_path, 'rb', buffering=1 << 20) as f:
+                sftp.putfo(f, remote_path, file_size=os.path.getsize(local_path))
+        return True
+    except Exception as err:
+        logger.debug(f"SFTP transfer failed: {err}")
+        return False
+
+def _has_free_space(dev, path, needed):
+    """Check that the filesystem holding *path* has *needed* bytes free.
+
+    One get-system-storage RPC; returns True when the answer cannot be
+    determined so an RPC quirk never blocks an otherwise valid install.
+    """
+    try:
+        storage = dev.rpc.get_system_storage()
+        best, avail = '', None
+        for entry in storage.findall('.//filesystem'):
+            mounted_on = (entry.findtext('mounted-on') or '').strip()
+            blocks = entry.findtext('available-blocks')
+            if not blocks or not path.startswith(mounted_on):
+                continue
+            if len(mounted_on) > len(best):
+                # Junos reports storage in 512-byte blocks
+                best, avail = mounted_on, int(blocks) * 512
+        if avail is not None and avail < needed:
+            logger.error(f"Insufficient space on {best}: "
+                         f"{avail/1024/1024:.0f} MB free, need {needed/1024/1024:.0f} MB")
+            return False
+    except Exception as err:
+        logger.debug(f"Storage pre-check skipped: {err}")
+    return True
+
+def install_image(dev, config):
     """Install Junos software from the remote path."""
-    image_name = os.path.basename(image_name)
-    remote_full_path = os.path.join(remote_path, image_name)
-    logger.info(f"Installing image from {remote_full_path}")
-    
+    logger.info(f"Installing image from {config.remote_image_fullpath}")
+
     try:
-        sw = SW(dev)
+        sw = _sw(dev)
+        # cleanfs is disabled below, so verify up front that /var/tmp can
+        # hold the unpacked image instead of failing mid-install
+        if os.path.exists(config.local_image_fullpath):
+            if not _has_free_space(dev, '/var/tmp', os.path.getsize(config.local_image_fullpath)):
+                return False
         logger.info("Starting installation (this may take several minutes)...")
         ok, msg = sw.install(
-            package=image_name,
+            package=config.image_name,
             validate=False,
-            remote_path=remote_path,  # Temp directory for installation
+            remote_path=config.remote_path,  # Temp directory for installation
             progress=True,
             no_copy=True,  # File is already on device
+            cleanfs=False,  # Skip the slow storage-cleanup RPC; space is pre-checked above
             timeout=2400,
+            checksum=config.local_image_sha256,  # Precomputed local hash; skips a full on-device pass
             checksum_timeout=400,
             checksum_algorithm='sha256'
         )
@@ -225,10 +513,26 @@ def install_image(dev, remote_path, image_name):
         logger.error(f"Installation error: {err}")
         return False
 
+def _get_version(dev):
+    """Fetch the running Junos version with a single RPC.
+
+    Reading dev.facts triggers the full facts gathering (around fifteen
+    RPCs); get-system-information returns the one field we need. Falls back
+    to facts on platforms without that RPC.
+    """
+    try:
+        sysinfo = dev.rpc.get_system_information()
+        version = sysinfo.findtext('os-version')
+        if version:
+            return version
+    except Exception as err:
+        logger.debug(f"get-system-information failed, falling back to facts: {err}")
+    return dev.facts.get('version', '')
+
 def verify_version(dev, expected_prefix):
     """Verify the device version after upgrade."""
     try:
-        version = dev.facts.get("version", "")
+        version = _get_version(dev)
         logger.info(f"Detected version: {version}")
         
         if version.startswith(expected_prefix):
@@ -241,49 +545,43 @@ def verify_version(dev, expected_prefix):
         logger.error(f"Version verification error: {err}")
         return False
 
-def main():
-    """Main function that coordinates the upgrade process."""
-    print("\n" + "="*60)
-    print(" 🔄 JUNOS OS UPGRADE UTILITY ".center(60, "="))
-    print("="*60 + "\n")
-    
-    logger.info("Starting upgrade process")
-    config = load_config()
-    
+def upgrade_one(config):
+    """Run the full upgrade pipeline for a single device."""
     # Connect to device
-    dev = connect_device(config['host'], config['user'], config['password'])
+    dev = connect_device(config.host, config.user, config.password)
     if not dev:
         logger.error("Failed to connect to device, aborting")
         return 1
     
     try:
         # Check version before upgrade
-        current_version = dev.facts.get('version')
+        current_version = _get_version(dev)
         logger.info(f"Current version: {current_version}")
-        if current_version.startswith(config['expected_version']):
+        if current_version.startswith(config.expected_version):
             logger.info("Device is already on the expected version, no upgrade needed")
             return 0
-        # Check and copy image if needed
-        image_exists = check_image_on_device(dev, config['remote_path'], config['image_name'])
+        # The background hash started at config load has been overlapping the
+        # connect and version check; collect it after the remote image check
+        image_exists = check_image_on_device(dev, config.remote_path, config.image_name)
+        config.cache_sha256(_sha256_file_async(config.local_image_fullpath).result())
         if not image_exists:
             logger.info("Image not found on device, initiating copy...")
-            if not copy_image_to_device(dev, config['local_image_dir'], config['remote_path'], config['image_name']):
+            if not copy_image_to_device(dev, config):
                 logger.error("Image copy failed, aborting")
                 return 1
         
         # Install the image
-        if install_image(dev, config['remote_path'], config['image_name']):
+        if install_image(dev, config):
             # Close connection before reboot
             dev.close()
-            logger.info("Device is rebooting approximately in 12 minutes...")
             logger.info("Please wait for the device to reboot and come back online...")
-            # wait for device to goinf to reboot
-            time.sleep(720)  # Wait for 120 seconds before probing again
+            # Wait for the reboot to actually start (TCP listener drops)
+            wait_for_reboot_start(config.host, config.timeout)
             # Wait for device to come back online
-            dev = probe_device(config['host'], config['user'], config['password'], config['timeout'])
+            dev = probe_device(config.host, config.user, config.password, config.timeout)
             if dev:
                 # Verify version after upgrade
-                if verify_version(dev, config['expected_version']):
+                if verify_version(dev, config.expected_version):
                     print("\n" + "="*60)
                     print(" ✅ UPGRADE COMPLETED SUCCESSFULLY ".center(60, "="))
                     print("="*60 + "\n")
@@ -315,6 +613,60 @@ def main():
             dev.close()
             logger.info("Connection closed")
 
+def upgrade_many(configs, max_inflight=2):
+    """Upgrade several devices concurrently with a bounded in-flight count.
+
+    The copy phases of different devices overlap (they are network-bound),
+    while each device's own pipeline stays strictly sequential. A small
+    window beats both serial execution and unbounded fan-out, which would
+    saturate the uplink during the copy phase; the default of 2 reflects
+    that trade-off.
+    """
+    async def _run():
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(max_inflight)
+
+        async def _one(cfg):
+            async with semaphore:
+                return await loop.run_in_executor(None, upgrade_one, cfg)
+
+        return await asyncio.gather(*(_one(cfg) for cfg in configs))
+
+    results = asyncio.run(_run())
+    failed = [cfg.host for cfg, rc in zip(configs, results) if rc != 0]
+    if failed:
+        logger.error(f"Upgrade failed on {len(failed)} device(s): {', '.join(failed)}")
+        return 1
+    logger.success(f"All {len(configs)} devices upgraded successfully")
+    return 0
+
+def main():
+    """Main function that coordinates the upgrade process."""
+    print("\n" + "="*60)
+    print(" 🔄 JUNOS OS UPGRADE UTILITY ".center(60, "="))
+    print("="*60 + "\n")
+
+    logger.info("Starting upgrade process")
+    signal.signal(signal.SIGINT, _handle_sigint)
+    config = UpgradeConfig.from_env_and_args()
+
+    if config.devices_file:
+        try:
+            with open(config.devices_file) as f:
+                hosts = [line.strip() for line in f
+                         if line.strip() and not line.strip().startswith('#')]
+        except OSError as err:
+            logger.error(f"Cannot read devices file: {err}")
+            return 1
+        if not hosts:
+            logger.error(f"No devices listed in {config.devices_file}")
+            return 1
+        logger.info(f"Fleet mode: {len(hosts)} devices, max {config.max_inflight} in flight")
+        configs = [replace(config, host=host) for host in hosts]
+        return upgrade_many(configs, config.max_inflight)
+
+    return upgrade_one(config)
+
 if __name__ == "__main__":
     try:
         exit_code = main()
@@ -323,4 +675,10 @@ if __name__ == "__main__":
         print("\n" + "="*60)
         print(" ❌ UPGRADE PROCESS INTERRUPTED ".center(60, "="))
         print("="*60 + "\n")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
+    finally:
+        # Unblock in-flight background work (e.g. the image hash) before
+        # interpreter shutdown joins the executor's non-daemon worker;
+        # threading's exit hooks run before atexit, so an atexit.register
+        # of this would fire too late
+        _stop.set()
\ No newline at end of file